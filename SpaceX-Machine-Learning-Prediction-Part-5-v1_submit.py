@@ -56,6 +56,7 @@ get_ipython().system('pip install numpy')
 get_ipython().system('pip install pandas')
 get_ipython().system('pip install seaborn')
 get_ipython().system('pip install scikit-learn')
+get_ipython().system('pip install pyarrow')
 
 
 # We will import the following libraries for the lab
@@ -111,13 +112,22 @@ def plot_confusion_matrix(y,y_predict):
 # ## Load the dataframe
 # 
 
+# `load_dataset()` from `spacex_datasets.py` downloads the data set once, verifies it by SHA-256 and memory-maps a Feather copy of it.
+# 
+
+# In[ ]:
+
+
+from spacex_datasets import load_dataset
+
+
 # Load the data
 # 
 
 # In[4]:
 
 
-data = pd.read_csv("https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/IBM-DS0321EN-SkillsNetwork/datasets/dataset_part_2.csv")
+data = load_dataset('dataset_part_2')
 
 
 # In[5]:
@@ -129,7 +139,7 @@ data.head()
 # In[6]:
 
 
-X = pd.read_csv('https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/IBM-DS0321EN-SkillsNetwork/datasets/dataset_part_3.csv')
+X = load_dataset('dataset_part_3')
 
 
 # In[7]:
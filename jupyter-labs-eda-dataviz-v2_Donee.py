@@ -57,6 +57,7 @@ get_ipython().system('pip install pandas')
 get_ipython().system('pip install numpy')
 get_ipython().system('pip install seaborn')
 get_ipython().system('pip install matplotlib')
+get_ipython().system('pip install pyarrow')
 
 
 # ### Import Libraries and Define Auxiliary Functions
@@ -79,6 +80,15 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 
+# `load_dataset()` from `spacex_datasets.py` downloads the data set once, verifies it by SHA-256 and memory-maps a Feather copy of it.
+# 
+
+# In[ ]:
+
+
+from spacex_datasets import load_dataset
+
+
 # ## Exploratory Data Analysis 
 # 
 
@@ -88,7 +98,7 @@ import seaborn as sns
 # In[3]:
 
 
-df=pd.read_csv("https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/IBM-DS0321EN-SkillsNetwork/datasets/dataset_part_2.csv")
+df=load_dataset('dataset_part_2')
 
 # If you were unable to complete the previous lab correctly you can uncomment and load this csv
 
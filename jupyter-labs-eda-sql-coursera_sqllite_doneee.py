@@ -80,6 +80,7 @@ cur = con.cursor()
 
 
 get_ipython().system('pip install -q pandas')
+get_ipython().system('pip install -q pyarrow')
 
 
 # In[6]:
@@ -88,15 +89,132 @@ get_ipython().system('pip install -q pandas')
 get_ipython().run_line_magic('sql', 'sqlite:///my_data1.db')
 
 
+# `load_dataset()` from `spacex_datasets.py` downloads the data set once, verifies it by SHA-256 and memory-maps a Feather copy of it.
+# 
+
+# In[ ]:
+
+
+from spacex_datasets import DATASETS, fetch_dataset, load_dataset
+
+
+# `df.to_sql(..., method="multi")` builds one large multi-row `INSERT` per batch with SQLite's default journal and sync settings, and the blank rows of the CSV are only dropped afterwards by copying the whole table into `SPACEXTABLE`. `load_spacex_table()` instead creates `SPACEXTBL` with a declared schema, and `load_spacex_rows()` streams the CSV into it block by block with pyarrow's streaming CSV reader, all inside one transaction. Each block's columns are laid out row after row in one flat list, without building a tuple per row, and `executemany` inserts them 100 rows per `INSERT` statement, which saves most of the per-statement work of one `INSERT` per row. It skips the rows without a `Date` while loading, with `synchronous=NORMAL` and a 64 MiB page cache. Only once the table is loaded and indexed does the database switch to WAL mode, which is durable across application crashes and only fsyncs at checkpoints; during the load it would write every page twice, once to the WAL and again at the checkpoint. A database already in WAL mode from an earlier run stays in it, since leaving WAL mode needs the only open connection to the database, and `%sql` holds another.
+# 
+
+# The dates are stored in ISO form, `YYYY-MM-DD`, whatever form the CSV file uses, and a `CHECK` constraint rejects any other form. `Year` and `Month` are generated from `Date`. `Launch_Site` compares without case. After committing the rows, `create_indexes()` indexes only the columns the tasks below search on: `Date`, `Year`, `Launch_Site`, `Landing_Outcome`, `Customer`, `Booster_Version` and `PAYLOAD_MASS__KG_`, plus `Mission_Outcome` together with `Landing_Outcome` for the `GROUP BY` of Task 7. Building the indexes once after the rows are in is faster than updating them row by row, and since every index adds to the load time, the loader builds none that the tasks do not use.
+# 
+
+# In[ ]:
+
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+# The declared schema of SPACEXTBL, in the column order of Spacex.csv. Date holds ISO dates, YYYY-MM-DD
+SPACEXTBL_SCHEMA = [('Date', "TEXT NOT NULL CHECK (Date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]')"),
+                    ('Time (UTC)', 'TEXT'),
+                    ('Booster_Version', 'TEXT'),
+                    ('Launch_Site', 'TEXT COLLATE NOCASE'),
+                    ('Payload', 'TEXT'),
+                    ('PAYLOAD_MASS__KG_', 'INTEGER'),
+                    ('Orbit', 'TEXT'),
+                    ('Customer', 'TEXT'),
+                    ('Mission_Outcome', 'TEXT'),
+                    ('Landing_Outcome', 'TEXT')]
+
+# Columns SQLite computes from Date
+SPACEXTBL_GENERATED = [('Year', 'INTEGER GENERATED ALWAYS AS (CAST(substr(Date, 1, 4) AS INTEGER)) VIRTUAL'),
+                       ('Month', 'INTEGER GENERATED ALWAYS AS (CAST(substr(Date, 6, 2) AS INTEGER)) VIRTUAL')]
+
+# The indexes built once the rows are loaded, by name suffix: one for each column the task queries search on.
+# Launch_Site compares without case, so its index serves both the LIKE 'CCA%' prefix search and the DISTINCT.
+# The GROUP BY Mission_Outcome query reads every row, from an index that covers both of its columns
+SPACEXTBL_INDEXES = {'Date': 'Date',
+                     'Year': 'Year',
+                     'Launch_Site': 'Launch_Site COLLATE NOCASE',
+                     'Landing_Outcome': 'Landing_Outcome',
+                     'Mission_Outcome': 'Mission_Outcome, Landing_Outcome',
+                     'Customer': 'Customer',
+                     'Booster_Version': 'Booster_Version',
+                     'PAYLOAD_MASS__KG_': 'PAYLOAD_MASS__KG_'}
+
+# Rewrites DD-MM-YYYY dates to YYYY-MM-DD and drops any time of day, so that dates compare and sort as text
+def normalize_dates(dates):
+    dates = pc.replace_substring_regex(dates, pattern=r'^(\d{2})-(\d{2})-(\d{4})', replacement=r'\3-\2-\1')
+    return pc.utf8_slice_codeunits(dates, 0, 10)
+
+# Sets the sync and cache pragmas used for bulk loads
+def tune_connection(con, cache_size_kib=65536):
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA cache_size=-%d" % cache_size_kib)
+
+# Replaces `table` with the rows of the CSV file that have a Date, streamed in blocks inside one transaction.
+# Each INSERT statement adds `rows_per_insert` rows. Returns the number of rows loaded
+def load_spacex_rows(con, path, table='SPACEXTBL', block_size=4 * 2**20, rows_per_insert=100):
+    tune_connection(con)
+    names = [name for name, _ in SPACEXTBL_SCHEMA]
+    width = len(names)
+    # Numbers are read as floats, which the INTEGER columns store as integers when they are whole
+    column_types = {name: pa.float64() if sql_type.startswith('INTEGER') else pa.string() for name, sql_type in SPACEXTBL_SCHEMA}
+    reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=block_size),
+                             convert_options=pa_csv.ConvertOptions(column_types=column_types, include_columns=names,
+                                                                   strings_can_be_null=True))
+    columns = ', '.join('"%s" %s' % column for column in SPACEXTBL_SCHEMA + SPACEXTBL_GENERATED)
+    insert = 'INSERT INTO "%s" (%s) VALUES ' % (table, ', '.join('"%s"' % name for name in names))
+    placeholders = '(%s)' % ', '.join('?' * width)
+    insert_many = insert + ', '.join([placeholders] * rows_per_insert)
+    step = rows_per_insert * width
+    rows = 0
+    with con:
+        con.execute("BEGIN")
+        con.execute('DROP TABLE IF EXISTS "%s"' % table)
+        con.execute('CREATE TABLE "%s" (%s)' % (table, columns))
+        for batch in reader:
+            batch = batch.filter(pc.is_valid(batch.column('Date')))
+            values = [batch.column(name) for name in names]
+            values[names.index('Date')] = normalize_dates(batch.column('Date'))
+            # The values of the batch row after row in one list, each column filling every width-th slot
+            flat = [None] * (batch.num_rows * width)
+            for position, column in enumerate(values):
+                flat[position::width] = column.to_pylist()
+            full = len(flat) - len(flat) % step
+            con.executemany(insert_many, (flat[start:start + step] for start in range(0, full, step)))
+            if full < len(flat):
+                con.execute(insert + ', '.join([placeholders] * ((len(flat) - full) // width)), flat[full:])
+            rows += batch.num_rows
+    return rows
+
+# Builds the indexes on `table`, in one transaction
+def create_indexes(con, table='SPACEXTBL', indexes=SPACEXTBL_INDEXES):
+    with con:
+        con.execute("BEGIN")
+        for suffix, indexed in indexes.items():
+            con.execute('CREATE INDEX "%s_%s" ON "%s" (%s)' % (table, suffix, table, indexed))
+
+# Loads the rows of the CSV file into `table`, indexes it and switches the database to WAL.
+# Returns the number of rows loaded
+def load_spacex_table(con, path, table='SPACEXTBL'):
+    rows = load_spacex_rows(con, path, table)
+    create_indexes(con, table)
+    # WAL only now: during the load it would write every page twice, to the WAL and again at the checkpoint
+    con.execute("PRAGMA journal_mode=WAL")
+    return rows
+
+
 # In[7]:
 
 
 import pandas as pd
-df = pd.read_csv("https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/IBM-DS0321EN-SkillsNetwork/labs/module_2/data/Spacex.csv")
-df.to_sql("SPACEXTBL", con, if_exists='replace', index=False,method="multi")
+df = load_dataset('spacex')
+load_spacex_table(con, fetch_dataset('spacex'))
 
+# SPACEXTABLE is now a view, so drop the table copy that earlier runs of this lab made
+if con.execute("SELECT type FROM sqlite_master WHERE name = 'SPACEXTABLE'").fetchone() == ('table',):
+    con.execute("DROP TABLE SPACEXTABLE")
 
-# **Note:This below code is added to remove blank rows from table**
+
+# **Note:The blank rows of the CSV file are already skipped by the loader, so `SPACEXTABLE` is a view of `SPACEXTBL` rather than a second copy of it**
 # 
 
 # In[8]:
@@ -104,13 +222,13 @@ df.to_sql("SPACEXTBL", con, if_exists='replace', index=False,method="multi")
 
 #DROP THE TABLE IF EXISTS
 
-get_ipython().run_line_magic('sql', 'DROP TABLE IF EXISTS SPACEXTABLE;')
+get_ipython().run_line_magic('sql', 'DROP VIEW IF EXISTS SPACEXTABLE;')
 
 
 # In[9]:
 
 
-get_ipython().run_line_magic('sql', 'create table SPACEXTABLE as select * from SPACEXTBL where Date is not null')
+get_ipython().run_line_magic('sql', 'create view SPACEXTABLE as select * from SPACEXTBL')
 
 
 # ## Tasks
@@ -240,11 +358,13 @@ get_ipython().run_line_magic('sql', 'SELECT Booster_Version, PAYLOAD_MASS__KG_ F
 # 
 # **Note: SQLLite does not support monthnames. So you need to use  substr(Date, 6,2) as month to get the months and substr(Date,0,5)='2015' for year.**
 # 
+# The generated `Month` and `Year` columns hold these values, and `Year` is indexed, so the query below uses them rather than scanning every `Date` through `substr()`.
+# 
 
 # In[29]:
 
 
-get_ipython().run_line_magic('sql', "SELECT substr(Date, 6, 2) AS Month,Booster_Version,Launch_Site,Landing_Outcome FROM SPACEXTBL WHERE substr(Date, 0, 5) = '2015' AND Landing_Outcome LIKE '%Failure (drone ship)%'")
+get_ipython().run_line_magic('sql', "SELECT Month,Booster_Version,Launch_Site,Landing_Outcome FROM SPACEXTBL WHERE Year = 2015 AND Landing_Outcome LIKE '%Failure (drone ship)%'")
 
 
 # ### Task 10
@@ -261,6 +381,94 @@ get_ipython().run_line_magic('sql', "SELECT substr(Date, 6, 2) AS Month,Booster_
 get_ipython().run_line_magic('sql', "SELECT Landing_Outcome, COUNT(*) AS Total FROM SPACEXTBL WHERE Date BETWEEN '2010-06-04' AND '2017-03-20'GROUP BY Landing_Outcome ORDER BY Total DESC")
 
 
+# ### Query plans
+# 
+
+# `EXPLAIN QUERY PLAN` shows how SQLite runs each of the task queries above. `check_query_plans()` keeps the plan steps that read `SPACEXTBL` and raises an error unless each one is a `SEARCH` through an index. Tasks 1 and 7 need every row, for the `DISTINCT` and the `GROUP BY`, so for them a `SCAN` of a covering index, which never reads the table itself, is expected instead. Any other `SCAN`, even one `USING INDEX`, reads the whole table.
+# 
+
+# In[ ]:
+
+
+# The task queries, as run above
+LAB_QUERIES = {
+    'Task 1': 'SELECT DISTINCT launch_site FROM SPACEXTBL',
+    'Task 2': "SELECT * FROM SPACEXTBL WHERE launch_site LIKE 'CCA%' LIMIT 5",
+    'Task 3': "SELECT SUM(Payload_Mass__Kg_) AS Total_Payload_Mass_Kg FROM SPACEXTBL WHERE Customer = 'NASA (CRS)'",
+    'Task 4': "SELECT AVG(Payload_Mass__Kg_) AS Average_Payload_Mass_Kg FROM SPACEXTBL WHERE Booster_Version = 'F9 v1.1'",
+    'Task 5': "SELECT MIN(Date) AS First_Successful_Landing FROM SPACEXTBL WHERE Landing_Outcome = 'Success' AND Launch_Site = 'Ground Pad'",
+    'Task 6': "SELECT Booster_Version FROM SPACEXTBL WHERE Landing_Outcome = 'Success (drone ship)' AND Payload_Mass__Kg_ > 4000 AND Payload_Mass__Kg_ < 6000",
+    'Task 7': 'SELECT Mission_Outcome, Landing_Outcome,COUNT(*) AS Total FROM SPACEXTBL GROUP BY Mission_Outcome',
+    'Task 8': 'SELECT Booster_Version, PAYLOAD_MASS__KG_ FROM SPACEXTBL WHERE PAYLOAD_MASS__KG_ = (SELECT MAX(PAYLOAD_MASS__KG_) FROM SPACEXTBL)',
+    'Task 9': "SELECT Month,Booster_Version,Launch_Site,Landing_Outcome FROM SPACEXTBL WHERE Year = 2015 AND Landing_Outcome LIKE '%Failure (drone ship)%'",
+    'Task 10': "SELECT Landing_Outcome, COUNT(*) AS Total FROM SPACEXTBL WHERE Date BETWEEN '2010-06-04' AND '2017-03-20'GROUP BY Landing_Outcome ORDER BY Total DESC",
+}
+
+# The tasks that read every row, which they should do from a covering index rather than from the table
+COVERING_SCANS = {'Task 1', 'Task 7'}
+
+# Returns one row per plan step of each query that reads SPACEXTBL. A step must SEARCH an index, or for the
+# tasks in `covering_scans` SCAN a covering index. Raises a ValueError for any other step
+def check_query_plans(con, queries, table='SPACEXTBL', covering_scans=COVERING_SCANS):
+    rows = []
+    for task, query in queries.items():
+        for step in con.execute('EXPLAIN QUERY PLAN ' + query):
+            detail = step[-1]
+            if table not in detail:
+                continue
+            covering_scan = task in covering_scans and detail.startswith('SCAN %s USING COVERING INDEX' % table)
+            if not (detail.startswith('SEARCH') or covering_scan):
+                raise ValueError('%s reads %s without searching an index: %s' % (task, table, detail))
+            rows.append((task, detail))
+    return pd.DataFrame(rows, columns=['Task', 'Plan'])
+
+check_query_plans(con, LAB_QUERIES)
+
+
+# ### Bulk loading benchmark
+# 
+
+# We compare `to_sql(method="multi")` followed by the `SPACEXTABLE` copy with `load_spacex_rows()` on a CSV file of 1 million launches drawn from `Spacex.csv`. Each approach loads into its own fresh database file. The row load and the index build are timed separately, since building the indexes takes as long as loading the rows and would hide the difference between the two loads; we report the rows per second of the row load. At this size `to_sql` needs a `chunksize`, since a single multi-row `INSERT` would exceed SQLite's limit of 32,766 bound variables; 3,000 rows of 10 columns stay under it. Both approaches then build the indexes of `SPACEXTBL_INDEXES` with `create_indexes()`, except the one on `Year`, which the copied table does not have.
+# 
+
+# In[ ]:
+
+
+import os
+import time
+
+df[df['Date'].notna()].sample(1_000_000, replace=True, random_state=0).to_csv('Spacex_1m.csv', index=False)
+
+def load_with_to_sql(con, path):
+    frame = pd.read_csv(path, dtype=DATASETS['spacex']['dtype'])
+    frame.to_sql("SPACEXTBL", con, if_exists='replace', index=False, method="multi", chunksize=3000)
+    con.execute("DROP TABLE IF EXISTS SPACEXTABLE")
+    con.execute("CREATE TABLE SPACEXTABLE AS SELECT * FROM SPACEXTBL WHERE Date IS NOT NULL")
+    con.commit()
+    return con.execute("SELECT COUNT(*) FROM SPACEXTABLE").fetchone()[0]
+
+copy_indexes = {suffix: indexed for suffix, indexed in SPACEXTBL_INDEXES.items() if suffix != 'Year'}
+
+loading = []
+for name, load_rows, table, indexes in [('to_sql multi + copy', load_with_to_sql, 'SPACEXTABLE', copy_indexes),
+                                        ('load_spacex_rows', load_spacex_rows, 'SPACEXTBL', SPACEXTBL_INDEXES)]:
+    for suffix in ['', '-wal', '-shm']:
+        if os.path.exists('benchmark.db' + suffix):
+            os.remove('benchmark.db' + suffix)
+    bench_con = sqlite3.connect('benchmark.db')
+    start = time.perf_counter()
+    rows = load_rows(bench_con, 'Spacex_1m.csv')
+    loaded = time.perf_counter()
+    create_indexes(bench_con, table, indexes)
+    indexed = time.perf_counter()
+    bench_con.close()
+    loading.append({'loader': name, 'rows': rows, 'load_seconds': loaded - start, 'index_seconds': indexed - loaded,
+                    'load_rows_per_s': rows / (loaded - start)})
+
+os.remove('Spacex_1m.csv')
+pd.DataFrame(loading)
+
+
 # ### Reference Links
 # 
 # * <a href ="https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/IBMDeveloperSkillsNetwork-DB0201EN-SkillsNetwork/labs/Labs_Coursera_V5/labs/Lab%20-%20String%20Patterns%20-%20Sorting%20-%20Grouping/instructional-labs.md.html?origin=www.coursera.org">Hands-on Lab : String Patterns, Sorting and Grouping</a>  
@@ -57,6 +57,8 @@
 
 get_ipython().system('pip3 install beautifulsoup4')
 get_ipython().system('pip3 install requests')
+get_ipython().system('pip3 install lxml')
+get_ipython().system('pip3 install pyarrow')
 
 
 # In[2]:
@@ -71,6 +73,17 @@ import unicodedata
 import pandas as pd
 
 
+# All requests in this lab go through one shared session, made by `make_session` in `spacex_http.py`. It keeps keep-alive connections pooled, retries failed and throttled (`429`) responses with jittered exponential backoff that honors `Retry-After`, and records per-host response times in `http_session.latency`.
+# 
+
+# In[ ]:
+
+
+from spacex_http import make_session
+
+http_session = make_session()
+
+
 # and we will provide some helper functions for you to process web scraped HTML table
 # 
 
@@ -153,13 +166,14 @@ static_url = "https://en.wikipedia.org/w/index.php?title=List_of_Falcon_9_and_Fa
 # In[5]:
 
 
-# use requests.get() method with the provided static_url
-response = requests.get(static_url)
+# use the shared session's get() method with the provided static_url
+response = http_session.get(static_url)
 
 # assign the response to a object
 html_content = response.text
 
-print(html_content)
+# print the beginning of the page only, the whole page is several megabytes
+print(html_content[:1000])
 
 
 # Create a `BeautifulSoup` object from the HTML `response`
@@ -248,14 +262,95 @@ print(first_launch_table)
 # Next, we just need to iterate through the `<th>` elements and apply the provided `extract_column_from_header()` to extract column name one by one
 # 
 
+# `extract_column_from_header()` removes the `<br>`, link and reference elements from each `<th>` it reads, so the soup can no longer be read the same way afterwards, and every launch table's header gets rescanned. `header_schema()` instead reads the header texts without touching the tree and maps them to the `launch_dict` fields. The mapping is computed once per distinct header layout and cached under the normalized texts, `colspan` and `rowspan` of the header cells. The row's HTML would not do as a key, since the reference ids in it differ from table to table. The tables that follow reuse the precomputed column positions.
+# 
+
+# In[ ]:
+
+
+import lxml.html
+
+LAUNCH_TABLE_XPATH = ("//table[contains(concat(' ', normalize-space(@class), ' '), ' wikitable ')"
+                      " and contains(concat(' ', normalize-space(@class), ' '), ' plainrowheaders ')"
+                      " and contains(concat(' ', normalize-space(@class), ' '), ' collapsible ')]")
+
+# Normalized header text prefix, and the launch_dict fields read from that column
+HEADER_FIELDS = [('flightno', ['Flight No.']),
+                 ('dateandtime', ['Date', 'Time']),
+                 ('versionbooster', ['Version Booster']),
+                 ('launchsite', ['Launch site']),
+                 ('payloadmass', ['Payload mass']),
+                 ('payload', ['Payload']),
+                 ('orbit', ['Orbit']),
+                 ('customer', ['Customer']),
+                 ('launchoutcome', ['Launch outcome']),
+                 ('boosterlanding', ['Booster landing'])]
+
+# The fields read from the td cells of a launch row, in the order extract_row() expects them
+ROW_FIELDS = ['Date', 'Version Booster', 'Launch site', 'Payload', 'Payload mass', 'Orbit', 'Customer',
+              'Launch outcome', 'Booster landing']
+
+header_schemas = {}
+
+def parse_launch_tables(html_content):
+    """
+    This function parses the page once with lxml and returns the launch table elements
+    Input: the page as text or bytes
+    """
+    return lxml.html.document_fromstring(html_content).xpath(LAUNCH_TABLE_XPATH)
+
+def header_signature(header_row):
+    """
+    This function returns the layout of a table header row: the whitespace-normalized text, without the
+    reference marks, and the colspan and rowspan of every <th>
+    Input: the lxml <tr> element holding the <th> column headers
+    """
+    return tuple((' '.join(''.join(th.xpath('.//text()[not(ancestor::sup)]')).split()),
+                  th.get('colspan', '1'), th.get('rowspan', '1'))
+                 for th in header_row.iterchildren('th'))
+
+def header_schema(header_row):
+    """
+    This function maps the launch_dict fields to their column positions in a table header row,
+    computing the mapping once per distinct header layout
+    Input: the lxml <tr> element holding the <th> column headers
+    """
+    signature = header_signature(header_row)
+    if signature not in header_schemas:
+        schema = {}
+        for position, (text, _, _) in enumerate(signature):
+            key = re.sub(r'[^a-z]', '', text.lower())
+            fields = next((fields for prefix, fields in HEADER_FIELDS if key.startswith(prefix)), [])
+            schema.update((field, position) for field in fields)
+        header_schemas[signature] = schema
+    return header_schemas[signature]
+
+def row_order(header_row):
+    """
+    This function returns the td indices of a launch row in the order of ROW_FIELDS, or None when
+    the table already has the usual layout
+    Input: the lxml <tr> element holding the <th> column headers
+    """
+    schema = header_schema(header_row)
+    missing = [field for field in ['Flight No.'] + ROW_FIELDS if field not in schema]
+    if missing:
+        raise ValueError('Launch table header without the columns %s' % missing)
+    order = [schema[field] - (schema[field] > schema['Flight No.']) for field in ROW_FIELDS]
+    return None if order == list(range(len(ROW_FIELDS))) else order
+
+
 # In[10]:
 
 
 column_names = []
 
-# Apply find_all() function with `th` element on first_launch_table
-# Iterate each th element and apply the provided extract_column_from_header() to get a column name
-# Append the Non-empty column name (`if name is not None and len(name) > 0`) into a list called column_names
+# Parse the page once with lxml and keep its launch tables, which the lxml sections below read as well
+launch_tables = parse_launch_tables(response.content)
+
+# The header row of the first launch table is the row of <th> cells without <td> cells
+# header_schema() maps its cells to the launch_dict fields, and those fields are the column names
+first_header_row = launch_tables[0].xpath('.//tr[th and not(td)]')[0]
+column_names = list(header_schema(first_header_row))
 
 
 # Check the extracted column names
@@ -298,7 +393,7 @@ launch_df = pd.DataFrame(launch_dict)
 launch_dict= dict.fromkeys(column_names)
 
 # Remove an irrelvant column
-del launch_dict['Date and time ( )']
+launch_dict.pop('Date and time ( )', None)
 
 # Let's initial the launch_dict with each value to be an empty list
 launch_dict['Flight No.'] = []
@@ -364,7 +459,7 @@ for table_number,table in enumerate(soup.find_all('table',"wikitable plainrowhea
             bv=booster_version(row[1])
             if not(bv):
                 bv=row[1].a.string
-            print(bv)
+            #print(bv)
             
             # Launch Site
             # TODO: Append the bv into launch_dict with key `Launch Site`
@@ -420,6 +515,776 @@ df= pd.DataFrame({ key:pd.Series(value) for key, value in launch_dict.items() })
 # <code>df.to_csv('spacex_web_scraped.csv', index=False)</code>
 # 
 
+# ## Faster scraping
+# 
+
+# The cells above parse the page twice: once with `BeautifulSoup(html_content, 'html.parser')`, the slowest backend, and again with `pd.read_html(html_content)`. The following sections build a faster scraper on top of the same helpers.
+# 
+
+# ### lxml parse mode
+# 
+
+# `parse_launch_tables`, which TASK 2 used above, parses the page once with `lxml` and keeps only the `table.wikitable.plainrowheaders.collapsible` launch tables. The raw tables and the launch rows are then both read from that one tree, the `launch_tables` of TASK 2: `table_to_frame` replaces `pd.read_html`, and `extract_launch_dict` replaces the row loop.
+# 
+
+# In[ ]:
+
+
+import array
+import lxml.html
+import numpy as np
+
+LAUNCH_FIELDS = ['Flight No.', 'Date', 'Time', 'Version Booster', 'Launch site', 'Payload', 'Payload mass', 'Orbit',
+                 'Customer', 'Launch outcome', 'Booster landing']
+
+# Line breaks, and runs of two or more whitespace characters, which pd.read_html turns into single spaces
+WHITESPACE = re.compile(r'[\r\n]+|\s{2,}')
+
+def cell_text(cell):
+    """
+    This function returns the text of a table cell the way pd.read_html reads it: every <br> becomes a line
+    break, and line breaks and runs of whitespace then become single spaces
+    Input: a th or td element
+    """
+    text = ''.join('\n' if isinstance(node, lxml.html.HtmlElement) else node
+                   for node in cell.xpath('.//text() | .//br'))
+    return WHITESPACE.sub(' ', text).strip()
+
+def table_to_frame(table):
+    """
+    This function builds a data frame of a table element's cell texts, spreading rowspan and colspan cells
+    Input: a table element from parse_launch_tables()
+    """
+    rows, carried = [], {}
+    for tr in table.iter('tr'):
+        row, column = [], 0
+        for cell in tr.iterchildren('th', 'td'):
+            while column in carried:
+                text, left = carried[column]
+                row.append(text)
+                carried[column] = (text, left - 1) if left > 1 else None
+                if carried[column] is None:
+                    del carried[column]
+                column += 1
+            text = cell_text(cell)
+            for _ in range(int(cell.get('colspan', 1))):
+                if int(cell.get('rowspan', 1)) > 1:
+                    carried[column] = (text, int(cell.get('rowspan')) - 1)
+                row.append(text)
+                column += 1
+        while column in carried:
+            text, left = carried.pop(column)
+            row.append(text)
+            if left > 1:
+                carried[column] = (text, left - 1)
+            column += 1
+        rows.append(row)
+    header, body = rows[0], rows[1:]
+    width = max(len(row) for row in rows)
+    return pd.DataFrame([row + [None] * (width - len(row)) for row in body],
+                        columns=header + [None] * (width - len(header)))
+
+def launch_rows(tables):
+    """
+    This function yields the flight number and the td cells of every launch row
+    Input: the table elements from parse_launch_tables()
+    """
+    for table in tables:
+        order = None
+        for tr in table.iter('tr'):
+            th = tr.find('th')
+            if th is None:
+                continue
+            if tr.find('td') is None:
+                order = row_order(tr)
+                continue
+            flight_number = th.text_content().strip()
+            if flight_number.isdigit():
+                cells = tr.findall('td')
+                yield flight_number, cells if order is None else [cells[i] for i in order]
+
+def first_link_text(cell):
+    """
+    This function returns the text of the first link in a table cell, or None
+    Input: a td element
+    """
+    a = cell.find('.//a')
+    return a.text_content() if a is not None else None
+
+def extract_row(row):
+    """
+    This function returns the launch_dict fields after `Flight No.` for one launch row, visiting each cell once
+    Input: the td elements of a launch row
+    """
+    datatimelist = [data_time.strip() for data_time in row[0].itertext()]
+    mass = unicodedata.normalize("NFKD", row[4].text_content()).strip()
+    return (datatimelist[0].strip(','),
+            datatimelist[1],
+            ''.join(list(row[1].itertext())[0::2][0:-1]) or first_link_text(row[1]),
+            first_link_text(row[2]),
+            first_link_text(row[3]),
+            mass[0:mass.find("kg")+2] if mass else 0,
+            first_link_text(row[5]),
+            first_link_text(row[6]),
+            next(row[7].itertext(), None),
+            next(row[8].itertext(), None))
+
+def extract_launch_dict(tables, rows=None):
+    """
+    This function fills the launch_dict fields from the launch rows with the same rules as the row loop above.
+    Flight numbers are collected in an integer array, the other fields in lists
+    Input: the table elements from parse_launch_tables(), or the (flight number, cells) pairs to extract as `rows`
+    """
+    flight_numbers = array.array('q')
+    fields = []
+    for flight_number, row in (launch_rows(tables) if rows is None else rows):
+        flight_numbers.append(int(flight_number))
+        fields.append(extract_row(row))
+    columns = list(zip(*fields)) or [()] * (len(LAUNCH_FIELDS) - 1)
+    launch_dict = {key: list(column) for key, column in zip(LAUNCH_FIELDS[1:], columns)}
+    launch_dict['Flight No.'] = np.frombuffer(flight_numbers, dtype=np.int64)
+    return {key: launch_dict[key] for key in LAUNCH_FIELDS}
+
+
+# In[ ]:
+
+
+raw_launch_tables = [table_to_frame(table) for table in launch_tables]
+launch_df = pd.DataFrame(extract_launch_dict(launch_tables))
+launch_df.head()
+
+
+# To compare the two parse paths, we save a copy of the `oldid=1027686922` page once and time both on it: `html.parser` plus `pd.read_html` against the single lxml parse.
+# 
+
+# In[ ]:
+
+
+import io
+import os
+import time
+
+saved_page = 'falcon9_launches_1027686922.html'
+if not os.path.exists(saved_page):
+    # Fetch first and only move a complete page into place, so a failed fetch is never kept as the saved copy
+    page_response = http_session.get(static_url)
+    page_response.raise_for_status()
+    with open(saved_page + '.part', 'wb') as f:
+        f.write(page_response.content)
+    os.replace(saved_page + '.part', saved_page)
+with open(saved_page, 'rb') as f:
+    saved_html = f.read()
+
+def time_it(func, repeat=5):
+    """
+    This function returns the best wall-clock time of `repeat` calls of func()
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def parse_with_beautifulsoup():
+    page = saved_html.decode('utf-8')
+    tables = BeautifulSoup(page, 'html.parser').find_all('table', "wikitable plainrowheaders collapsible")
+    return tables, pd.read_html(io.StringIO(page))
+
+def parse_with_lxml():
+    tables = parse_launch_tables(saved_html)
+    return tables, [table_to_frame(table) for table in tables]
+
+# Both paths must read the same launch tables. read_html infers the column types, table_to_frame() keeps the texts
+read_html_tables = pd.read_html(io.StringIO(saved_html.decode('utf-8')), keep_default_na=False,
+                                attrs={'class': 'wikitable plainrowheaders collapsible'})
+lxml_tables = parse_with_lxml()[1]
+assert len(read_html_tables) == len(lxml_tables), 'table_to_frame and pd.read_html find different launch tables'
+for expected, frame in zip(read_html_tables, lxml_tables):
+    assert frame.equals(expected.astype(str)), 'table_to_frame and pd.read_html read different cell texts'
+
+pd.DataFrame({'seconds': {'html.parser + read_html': time_it(parse_with_beautifulsoup),
+                          'lxml': time_it(parse_with_lxml)}})
+
+
+# ### Scraping many revisions in parallel
+# 
+
+# To rebuild the launch history we scrape many pages at once: the yearly launch lists, past revisions of this page for backfill, or copies saved on disk. `scrape_many` parses each source in its own process. It then merges the launch rows and keeps one row per flight number, from the last source that has it, so sources should be listed from oldest to newest. The process pools of this lab ask for the `fork` start method explicitly, since only forked workers see the functions defined in the notebook. It is not the default on macOS, or on Linux from Python 3.14, and Windows does not have it at all.
+# 
+
+# In[ ]:
+
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import shutil
+
+# Worker processes forked from the kernel, which have the functions defined in this notebook
+fork_context = multiprocessing.get_context('fork')
+
+WIKI_INDEX_URL = "https://en.wikipedia.org/w/index.php"
+WIKI_API_URL = "https://en.wikipedia.org/w/api.php"
+LAUNCH_LIST_TITLE = "List of Falcon 9 and Falcon Heavy launches"
+
+# Past revisions of the launch list, oldest first: the revisions current on these days, then the page saved above,
+# which is revision 1027686922
+LAUNCH_LIST_REVISIONS = ['2020-01-01', '2020-04-01', '2020-07-01', '2020-10-01', '2021-01-01', '2021-04-01',
+                         saved_page]
+
+FIXTURE_DIR = 'fixtures'
+
+def revision_on(date, title=LAUNCH_LIST_TITLE):
+    """
+    This function returns the id of the revision of a Wikipedia page that was current at the start of a day
+    Input: a date as YYYY-MM-DD
+    """
+    params = {'action': 'query', 'format': 'json', 'prop': 'revisions', 'titles': title, 'rvprop': 'ids',
+              'rvlimit': 1, 'rvdir': 'older', 'rvstart': date + 'T00:00:00Z'}
+    response = http_session.get(WIKI_API_URL, params=params)
+    response.raise_for_status()
+    page = next(iter(response.json()['query']['pages'].values()))
+    return page['revisions'][0]['revid']
+
+def source_html(source):
+    """
+    This function returns the HTML of a source
+    Input: a revision id, a date for the launch list revision current on that day, a saved HTML file path
+    or a Wikipedia page title
+    """
+    if os.path.exists(str(source)):
+        with open(source, 'rb') as f:
+            return f.read()
+    if re.fullmatch(r'\d{4}-\d{2}-\d{2}', str(source)):
+        source = revision_on(source)
+    params = {'oldid': source} if str(source).isdigit() else {'title': source}
+    with make_session(pool_size=1) as session:
+        response = session.get(WIKI_INDEX_URL, params=params)
+        response.raise_for_status()
+        return response.content
+
+def freeze_fixtures(sources, directory=FIXTURE_DIR):
+    """
+    This function saves each source as an HTML fixture once, and returns the fixture paths in the order of the sources
+    Input: a list of revision ids, dates, saved HTML file paths or page titles
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for source in sources:
+        name = os.path.splitext(os.path.basename(str(source)))[0]
+        path = os.path.join(directory, name + '.html')
+        if not os.path.exists(path):
+            with open(path + '.part', 'wb') as f:
+                f.write(source_html(source))
+            shutil.move(path + '.part', path)
+        paths.append(path)
+    return paths
+
+def scrape_source(source):
+    """
+    This function returns the launch rows of one source as a data frame with a `Source` column
+    Input: a revision id, a saved HTML file path or a Wikipedia page title
+    """
+    frame = pd.DataFrame(extract_launch_dict(parse_launch_tables(source_html(source))))
+    frame['Source'] = str(source)
+    return frame
+
+def scrape_many(sources, processes=None):
+    """
+    This function scrapes the sources in a process pool and merges their rows, one per flight number,
+    later sources taking precedence
+    Input: a list of revision ids, saved HTML file paths or page titles, oldest first
+    """
+    with ProcessPoolExecutor(processes, mp_context=fork_context) as pool:
+        frames = list(pool.map(scrape_source, sources))
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.drop_duplicates('Flight No.', keep='last')
+    return merged.sort_values('Flight No.', key=lambda flight: flight.astype(int), ignore_index=True)
+
+
+# We freeze the revisions of `LAUNCH_LIST_REVISIONS` as HTML fixtures in `fixtures/`, fetching each one once, and time the batch scraper on them with a growing number of processes.
+# 
+
+# In[ ]:
+
+
+revision_files = freeze_fixtures(LAUNCH_LIST_REVISIONS)
+
+throughput = []
+for processes in sorted({1, 2, 4, os.cpu_count()}):
+    start = time.perf_counter()
+    history = scrape_many(revision_files, processes)
+    elapsed = time.perf_counter() - start
+    throughput.append({'processes': processes, 'pages': len(revision_files), 'launches': len(history),
+                       'pages_per_s': len(revision_files) / elapsed})
+pd.DataFrame(throughput)
+
+
+# ### Single-pass row extraction
+# 
+
+# The helpers `date_time`, `booster_version`, `landing_status` and `get_mass` each walk the strings of a cell separately, and the row loop walks `row[7]` once more. `extract_row` above visits every cell of a launch row once, and `extract_launch_dict` collects its fields into columns, with the flight numbers in an integer array. The helpers stay as the reference: `extract_launch_dict_reference` is the completed row loop built on them, and the two must give the same rows.
+# 
+
+# In[ ]:
+
+
+def extract_launch_dict_reference(soup):
+    """
+    This function fills a launch_dict with the row loop above and the provided helper functions
+    Input: the BeautifulSoup object of the page
+    """
+    launch_dict = {key: [] for key in LAUNCH_FIELDS}
+    for table in soup.find_all('table', "wikitable plainrowheaders collapsible"):
+        for rows in table.find_all("tr"):
+            if rows.th:
+                if rows.th.string:
+                    flight_number=rows.th.string.strip()
+                    flag=flight_number.isdigit()
+            else:
+                flag=False
+            row=rows.find_all('td')
+            if flag:
+                datatimelist=date_time(row[0])
+                bv=booster_version(row[1])
+                if not(bv):
+                    bv=row[1].a.string
+                launch_dict['Flight No.'].append(flight_number)
+                launch_dict['Date'].append(datatimelist[0].strip(','))
+                launch_dict['Time'].append(datatimelist[1])
+                launch_dict['Version Booster'].append(bv)
+                launch_dict['Launch site'].append(row[2].a.string)
+                launch_dict['Payload'].append(row[3].a.string)
+                launch_dict['Payload mass'].append(get_mass(row[4]))
+                launch_dict['Orbit'].append(row[5].a.string)
+                launch_dict['Customer'].append(row[6].a.string)
+                launch_dict['Launch outcome'].append(list(row[7].strings)[0])
+                launch_dict['Booster landing'].append(landing_status(row[8]))
+    return launch_dict
+
+
+# In[ ]:
+
+
+saved_soup = BeautifulSoup(saved_html.decode('utf-8'), 'html.parser')
+saved_tables = parse_launch_tables(saved_html)
+
+reference_df = pd.DataFrame(extract_launch_dict_reference(saved_soup)).astype(str)
+fast_df = pd.DataFrame(extract_launch_dict(saved_tables)).astype(str)
+assert reference_df.equals(fast_df), 'extract_launch_dict and the reference row loop give different rows'
+
+rows = len(fast_df)
+pd.DataFrame({'rows_per_s': {'helpers (BeautifulSoup)': rows / time_it(lambda: extract_launch_dict_reference(saved_soup)),
+                             'single pass (lxml)': rows / time_it(lambda: extract_launch_dict(saved_tables))}})
+
+
+# ### Typed output
+# 
+
+# The scraped columns are all strings: `get_mass` returns text like `"2,296 kg"` or the integer `0`, and the date and time stay in separate columns, so every later lab parses them again. `to_typed_frame` converts them once. The payload mass becomes a number of kilograms, `Date` and `Time` become one UTC timestamp, and the launch site, orbit, launch outcome and booster landing become categorical. The frame is written to Parquet, so loading the scraped data back is a columnar read with no parsing.
+# 
+
+# In[ ]:
+
+
+def to_typed_frame(launch_dict):
+    """
+    This function returns launch_dict as a typed data frame: `Launch time` as a UTC timestamp built from Date and Time,
+    `Payload mass (kg)` as a float and categorical launch site, orbit, launch outcome and booster landing
+    Input: a launch_dict from extract_launch_dict()
+    """
+    df = pd.DataFrame(launch_dict)
+    day = pd.to_datetime(df['Date'].str.strip(), format='%d %B %Y', errors='coerce')
+    clock = df['Time'].str.extract(r'(\d{1,2}:\d{2}(?::\d{2})?)')[0]
+    clock = clock.where(clock.str.count(':') == 2, clock + ':00')
+    mass = df['Payload mass'].astype(str).str.extract(r'([\d,.]+)\s*kg')[0].str.replace(',', '')
+    return pd.DataFrame({
+        'Flight No.': df['Flight No.'].astype('int64'),
+        'Launch time': (day + pd.to_timedelta(clock, errors='coerce')).dt.tz_localize('UTC'),
+        'Version Booster': df['Version Booster'],
+        'Launch site': df['Launch site'].astype('category'),
+        'Payload': df['Payload'],
+        'Payload mass (kg)': pd.to_numeric(mass, errors='coerce'),
+        'Orbit': df['Orbit'].astype('category'),
+        'Customer': df['Customer'],
+        'Launch outcome': df['Launch outcome'].str.strip().astype('category'),
+        'Booster landing': df['Booster landing'].str.strip().astype('category'),
+    })
+
+
+# In[ ]:
+
+
+typed_df = to_typed_frame(extract_launch_dict(launch_tables))
+typed_df.to_parquet('spacex_web_scraped.parquet', index=False)
+typed_df.dtypes
+
+
+# Reading the Parquet file back gives the typed columns directly, while the CSV has to be parsed and converted again:
+# 
+
+# In[ ]:
+
+
+# A scratch copy of the scraped rows as CSV, so that the lab's own spacex_web_scraped.csv is left alone
+pd.DataFrame(extract_launch_dict(launch_tables)).to_csv('typed_read_benchmark.csv', index=False)
+
+read_times = pd.DataFrame({'seconds': {
+    'CSV + to_typed_frame': time_it(lambda: to_typed_frame(pd.read_csv('typed_read_benchmark.csv', dtype=str, keep_default_na=False))),
+    'Parquet': time_it(lambda: pd.read_parquet('spacex_web_scraped.parquet')),
+}})
+os.remove('typed_read_benchmark.csv')
+read_times
+
+
+# ### Conditional requests and a page cache
+# 
+
+# `requests.get(static_url)` downloads the whole page on every run, even when it has not changed. `PageCache` stores the page body with its `ETag`, `Last-Modified` and SHA-256 hash, and also the typed launch rows extracted from it. The next fetch sends `If-None-Match` and `If-Modified-Since`. When the server answers `304 Not Modified`, or sends back a body with the same hash, the stored rows are returned without parsing anything.
+# 
+
+# In[ ]:
+
+
+import gzip
+import hashlib
+import json
+import shutil
+
+class PageCache:
+    """
+    This class caches pages in `directory` with their validators and content hash, together with the launch rows
+    extracted from them
+    """
+    def __init__(self, directory='page_cache'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, url, suffix):
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest() + suffix)
+
+    def fetch_launches(self, url, session=None):
+        """
+        This function returns the typed launch rows of the page at `url` and how they were obtained:
+        'not modified', 'unchanged' or 'parsed'
+        """
+        session = session or http_session
+        meta_path, rows_path = self.path(url, '.json'), self.path(url, '.parquet')
+        meta = {}
+        if os.path.exists(meta_path) and os.path.exists(rows_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        response = session.get(url, headers=headers)
+        if response.status_code == 304 and meta:
+            return pd.read_parquet(rows_path), 'not modified'
+        response.raise_for_status()
+        digest = hashlib.sha256(response.content).hexdigest()
+        status = 'unchanged' if meta.get('sha256') == digest else 'parsed'
+        if status == 'parsed':
+            rows = to_typed_frame(extract_launch_dict(parse_launch_tables(response.content)))
+            rows.to_parquet(rows_path, index=False)
+            with gzip.open(self.path(url, '.html.gz'), 'wb') as f:
+                f.write(response.content)
+        meta = {'url': url, 'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified'),
+                'sha256': digest}
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        return (pd.read_parquet(rows_path) if status == 'unchanged' else rows), status
+
+
+# The first call parses the page; the second one only revalidates it:
+# 
+
+# In[ ]:
+
+
+page_cache = PageCache()
+for attempt in range(2):
+    start = time.perf_counter()
+    cached_df, status = page_cache.fetch_launches(static_url)
+    print('%s: %d rows in %.3f s' % (status, len(cached_df), time.perf_counter() - start))
+
+
+# ### Incremental re-scrapes
+# 
+
+# When the launch list gains a few rows, there is no need to extract years of history again. `incremental_scrape` fingerprints the cells of every launch row, keyed by flight number, and compares the fingerprints with those stored by the previous scrape. Only new or edited rows go through the extraction. The stored rows are updated, and a change set of added, changed and removed flight numbers is returned for the labs that consume the data.
+# 
+
+# In[ ]:
+
+
+def row_fingerprint(row):
+    """
+    This function returns a hash of the HTML of a launch row's cells
+    Input: the td elements of a row
+    """
+    return hashlib.sha1(b''.join(lxml.html.tostring(cell) for cell in row)).hexdigest()
+
+def incremental_scrape(html_content, state_dir='scrape_state'):
+    """
+    This function returns the typed launch rows of the page and a change set
+    {'added': [...], 'changed': [...], 'removed': [...]} of flight numbers since the previous scrape in `state_dir`
+    Input: the page as text or bytes
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    fingerprints_path = os.path.join(state_dir, 'fingerprints.json')
+    rows_path = os.path.join(state_dir, 'launch_rows.parquet')
+    previous, previous_rows = {}, None
+    if os.path.exists(fingerprints_path) and os.path.exists(rows_path):
+        with open(fingerprints_path) as f:
+            previous = {int(flight_number): fingerprint for flight_number, fingerprint in json.load(f).items()}
+        previous_rows = pd.read_parquet(rows_path)
+
+    rows = {int(flight_number): row for flight_number, row in launch_rows(parse_launch_tables(html_content))}
+    fingerprints = {flight_number: row_fingerprint(row) for flight_number, row in rows.items()}
+    changes = {'added': [flight_number for flight_number in fingerprints if flight_number not in previous],
+               'changed': [flight_number for flight_number in fingerprints
+                           if flight_number in previous and previous[flight_number] != fingerprints[flight_number]],
+               'removed': [flight_number for flight_number in previous if flight_number not in fingerprints]}
+
+    if previous_rows is None or changes['added'] or changes['changed'] or changes['removed']:
+        fresh = to_typed_frame(extract_launch_dict(None, rows=[(flight_number, rows[flight_number])
+                                                               for flight_number in changes['added'] + changes['changed']]))
+        if previous_rows is not None:
+            kept = previous_rows[~previous_rows['Flight No.'].isin(changes['changed'] + changes['removed'])]
+            fresh = pd.concat([kept, fresh], ignore_index=True).sort_values('Flight No.', ignore_index=True)
+            for column in ['Launch site', 'Orbit', 'Launch outcome', 'Booster landing']:
+                fresh[column] = fresh[column].astype('category')
+        fresh.to_parquet(rows_path, index=False)
+        with open(fingerprints_path, 'w') as f:
+            json.dump(fingerprints, f)
+        previous_rows = fresh
+    return previous_rows, changes
+
+
+# The first scrape, of the April 2021 revision, extracts every row. Scraping the same revision again finds nothing to extract, and the later revision saved above only extracts the rows that were added or edited since:
+# 
+
+# In[ ]:
+
+
+shutil.rmtree('scrape_state', ignore_errors=True)
+for source in [revision_files[-2], revision_files[-2], revision_files[-1]]:
+    start = time.perf_counter()
+    scraped_df, changes = incremental_scrape(source_html(source))
+    print('%s: %d rows, %d added, %d changed, %d removed in %.3f s' % (
+        source, len(scraped_df), len(changes['added']), len(changes['changed']), len(changes['removed']),
+        time.perf_counter() - start))
+
+
+# ### Streaming parse
+# 
+
+# The cells at the top keep `response.text`, the whole soup tree, `tables` and the `html_tables` list alive at the same time. `stream_launch_rows` feeds the body chunk by chunk into lxml's incremental `HTMLPullParser`. It yields each launch row as soon as its `<tr>` closes, and discards every element it has finished with. Peak memory then stays bounded however large the page is and however many pages are streamed one after the other.
+# 
+
+# In[ ]:
+
+
+from lxml import etree
+import resource
+
+LAUNCH_TABLE_CLASSES = {'wikitable', 'plainrowheaders', 'collapsible'}
+
+def stream_launch_rows(chunks, encoding='utf-8'):
+    """
+    This function parses a page from an iterable of byte chunks and yields every launch row as a dictionary
+    as soon as its <tr> closes, dropping the parsed elements as it goes
+    Input: an iterable of bytes, e.g. response.iter_content()
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+    open_tables, order = 0, None
+
+    def launch_row_events():
+        nonlocal open_tables, order
+        for event, element in parser.read_events():
+            if element.tag == 'table' and (open_tables or LAUNCH_TABLE_CLASSES <= set(element.get('class', '').split())):
+                open_tables += 1 if event == 'start' else -1
+            if event != 'end':
+                continue
+            if element.tag == 'tr' and open_tables:
+                th = element.find('th')
+                cells = element.findall('td')
+                if th is not None and not cells:
+                    order = row_order(element)
+                flight_number = th.text_content().strip() if th is not None else ''
+                if flight_number.isdigit():
+                    cells = cells if order is None else [cells[i] for i in order]
+                    yield dict(zip(LAUNCH_FIELDS, (int(flight_number),) + extract_row(cells)))
+            if element.tag == 'tr' or not open_tables:
+                element.clear()
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from launch_row_events()
+    parser.close()
+    yield from launch_row_events()
+
+def stream_scrape(url, session=None, chunk_size=64 * 1024):
+    """
+    This function streams the page at `url` and returns its launch rows as a typed data frame
+    """
+    session = session or http_session
+    with session.get(url, stream=True) as response:
+        response.raise_for_status()
+        rows = list(stream_launch_rows(response.iter_content(chunk_size)))
+    return to_typed_frame({key: [row[key] for row in rows] for key in LAUNCH_FIELDS})
+
+
+# In[ ]:
+
+
+streamed_df = stream_scrape(static_url)
+streamed_df.head()
+
+
+# The parsers allocate most of their memory outside Python, so we measure the growth of the peak resident set size (RSS) of a fresh worker process. We compare the page loaded whole, as in the cells at the top, with the streamed page, for a growing batch of pages read from disk.
+# 
+
+# In[ ]:
+
+
+def file_chunks(paths, chunk_size=64 * 1024):
+    for path in paths:
+        with open(path, 'rb') as f:
+            yield from iter(lambda: f.read(chunk_size), b'')
+
+def load_pages_whole(paths):
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            page = f.read()
+        soup = BeautifulSoup(page, 'html.parser')
+        pages.append((page, soup, soup.find_all('table'), pd.read_html(io.StringIO(page))))
+    return sum(len(extract_launch_dict_reference(soup)['Flight No.']) for _, soup, _, _ in pages)
+
+def load_pages_streaming(paths):
+    return sum(1 for _ in stream_launch_rows(file_chunks(paths)))
+
+def peak_rss_growth(func, *args):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = func(*args)
+    return result, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+
+peak_memory = []
+for pages in [1, 4, 16]:
+    for loader in [load_pages_whole, load_pages_streaming]:
+        with ProcessPoolExecutor(1, mp_context=fork_context) as pool:
+            rows, growth_kb = pool.submit(peak_rss_growth, loader, [saved_page] * pages).result()
+        peak_memory.append({'pages': pages, 'loader': loader.__name__, 'rows': rows, 'peak_rss_growth_mb': growth_kb / 1024})
+pd.DataFrame(peak_memory)
+
+
+# ### Benchmark and regression check
+# 
+
+# The timings above are each taken once, on one page, for a whole parse path. To tell whether a change to the scraper makes it faster or slower, we time both paths stage by stage on each of the `LAUNCH_LIST_REVISIONS` fixtures frozen above: the parse, the row extraction and the data frame build. The reference path is the main table loop with `date_time`, `booster_version`, `landing_status` and `get_mass`, and the fast path is the lxml one. Each stage runs in a fresh worker process, which records its rows per second and the growth of its peak RSS.
+# 
+
+# In[ ]:
+
+
+BENCHMARK_PIPELINES = {
+    'helpers (BeautifulSoup)': [('parse', lambda html: BeautifulSoup(html.decode('utf-8'), 'html.parser')),
+                                ('extract', extract_launch_dict_reference),
+                                ('frame', lambda launch_dict: pd.DataFrame({key: pd.Series(value) for key, value in launch_dict.items()}))],
+    'single pass (lxml)': [('parse', parse_launch_tables),
+                           ('extract', extract_launch_dict),
+                           ('frame', to_typed_frame)],
+}
+
+def benchmark_stage(path, pipeline, stage, repeat=3):
+    """
+    This function runs the stages of a pipeline before `stage` once, then times `stage` on their output.
+    It is meant to run in a fresh process, so that the peak RSS growth belongs to the stage
+    Input: a fixture path, a BENCHMARK_PIPELINES key and a stage index
+    """
+    with open(path, 'rb') as f:
+        value = f.read()
+    for _, func in BENCHMARK_PIPELINES[pipeline][:stage]:
+        value = func(value)
+    func = BENCHMARK_PIPELINES[pipeline][stage][1]
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    seconds = time_it(lambda: func(value), repeat)
+    output = func(value)
+    growth_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    rows = len(output) if stage == 2 else len(output['Flight No.']) if stage == 1 else None
+    return seconds, growth_kb, rows
+
+def run_benchmark(fixtures, repeat=3):
+    """
+    This function times every stage of every pipeline on every fixture, each in a fresh worker process
+    Input: a list of fixture paths
+    """
+    results = []
+    for path in fixtures:
+        for pipeline, stages in BENCHMARK_PIPELINES.items():
+            rows = None
+            for stage, (name, _) in enumerate(stages):
+                with ProcessPoolExecutor(1, mp_context=fork_context) as pool:
+                    seconds, growth_kb, stage_rows = pool.submit(benchmark_stage, path, pipeline, stage, repeat).result()
+                rows = rows if stage_rows is None else stage_rows
+                results.append({'fixture': os.path.basename(path), 'pipeline': pipeline, 'stage': name,
+                                'rows': rows, 'seconds': seconds, 'peak_rss_mb': growth_kb / 1024})
+    results = pd.DataFrame(results)
+    # The parse stage produces no rows, it is credited with the rows its pipeline extracts
+    results['rows'] = results.groupby(['fixture', 'pipeline'])['rows'].transform('last')
+    results['rows_per_s'] = results['rows'] / results['seconds']
+    return results
+
+
+# In[ ]:
+
+
+fixtures = freeze_fixtures(LAUNCH_LIST_REVISIONS)
+benchmark = run_benchmark(fixtures)
+benchmark
+
+
+# The results are compared with a baseline stored in `scraper_benchmark_baseline.json`, which is written on the first run. A stage regresses when its time, or its peak RSS growth, exceeds the baseline by more than `tolerance`. Differences under `time_slack_s` and `rss_slack_mb` are treated as noise, since the smallest stages take a few milliseconds. A change in the number of rows a stage returns for a fixture is always a regression. Once a change is known to be an improvement, rerun with `update=True` to make the new results the baseline.
+# 
+
+# In[ ]:
+
+
+BENCHMARK_KEYS = ['fixture', 'pipeline', 'stage']
+
+def check_benchmark(results, baseline_path='scraper_benchmark_baseline.json', tolerance=0.25, time_slack_s=0.005,
+                    rss_slack_mb=2.0, update=False):
+    """
+    This function compares benchmark results with the stored baseline and raises an AssertionError listing the
+    stages that regressed. The baseline is written when it does not exist yet, or when `update` is True
+    Input: the data frame from run_benchmark()
+    """
+    columns = BENCHMARK_KEYS + ['rows', 'seconds', 'rows_per_s', 'peak_rss_mb']
+    if update or not os.path.exists(baseline_path):
+        results[columns].to_json(baseline_path, orient='records', indent=1)
+        return results[columns]
+    baseline = pd.read_json(baseline_path, orient='records')
+    compared = results[columns].merge(baseline, on=BENCHMARK_KEYS, how='left', suffixes=('', '_baseline'))
+    compared['speed_ratio'] = compared['rows_per_s'] / compared['rows_per_s_baseline']
+    compared['regressed'] = ((compared['rows'] != compared['rows_baseline']) & compared['rows_baseline'].notna()
+                             | (compared['seconds'] > compared['seconds_baseline'] * (1 + tolerance) + time_slack_s)
+                             | (compared['peak_rss_mb'] > compared['peak_rss_mb_baseline'] * (1 + tolerance) + rss_slack_mb))
+    regressions = compared[compared['regressed']]
+    if not regressions.empty:
+        raise AssertionError('Scraper benchmark regressed:\n' + regressions.to_string(index=False))
+    return compared
+
+
+check_benchmark(benchmark)
+
+
 # ## Authors
 # 
 
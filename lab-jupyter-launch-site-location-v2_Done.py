@@ -38,15 +38,14 @@
 
 
 get_ipython().system('pip3 install folium')
-get_ipython().system('pip3 install wget')
 get_ipython().system('pip3 install pandas')
+get_ipython().system('pip3 install pyarrow')
 
 
 # In[2]:
 
 
 import folium
-import wget
 import pandas as pd
 
 
@@ -61,6 +60,15 @@ from folium.plugins import MousePosition
 from folium.features import DivIcon
 
 
+# `load_dataset()` from `spacex_datasets.py` downloads the data set once, through the shared session of `spacex_http.py`, verifies it by SHA-256 and memory-maps a Feather copy of it.
+# 
+
+# In[ ]:
+
+
+from spacex_datasets import load_dataset
+
+
 # If you need to refresh your memory about folium, you may download and refer to this previous folium lab:
 # 
 
@@ -80,8 +88,7 @@ from folium.features import DivIcon
 
 
 # Download and read the `spacex_launch_geo.csv`
-spacex_csv_file = wget.download('https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/IBM-DS0321EN-SkillsNetwork/datasets/spacex_launch_geo.csv')
-spacex_df=pd.read_csv(spacex_csv_file)
+spacex_df=load_dataset('spacex_launch_geo')
 
 
 # Now, you can take a look at what are the coordinates for each site.
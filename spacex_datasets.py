@@ -0,0 +1,135 @@
+# The data sets the labs download, kept in a local `datasets/` directory. fetch_dataset() downloads a data set once
+# and verifies it by SHA-256, and load_dataset() memory-maps an uncompressed Feather copy of it, converted once with
+# the dtypes listed in DATASETS, so later runs neither download nor parse the CSV again. Each lab loads its data with
+#
+#     from spacex_datasets import load_dataset
+#     df = load_dataset('dataset_part_2')
+#
+# The digests are kept in `datasets/manifest.json`. A data set is checked against the `sha256` pinned in DATASETS
+# when there is one, and otherwise against the digest recorded when it was first downloaded. The manifest also keeps
+# the size and modification time of each file, and a file is only hashed again once they change, so loading a data
+# set reads no more than the Feather columns it uses. When the published file changes, fetch_dataset(name,
+# refresh=True) downloads it again and records the new digest.
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from spacex_http import make_session
+
+DATASETS_URL = "https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/IBM-DS0321EN-SkillsNetwork"
+
+LAUNCH_DTYPES = {'FlightNumber': 'int64', 'Date': str, 'BoosterVersion': str, 'PayloadMass': 'float64', 'Orbit': str,
+                 'LaunchSite': str, 'Outcome': str, 'Flights': 'int64', 'GridFins': 'bool', 'Reused': 'bool',
+                 'Legs': 'bool', 'LandingPad': str, 'Block': 'float64', 'ReusedCount': 'int64', 'Serial': str,
+                 'Longitude': 'float64', 'Latitude': 'float64'}
+
+# The data sets: their URL, the SHA-256 of the published file when it is pinned, and the dtypes to read them with.
+# Columns not listed are inferred
+DATASETS = {
+    'dataset_part_1': {'url': DATASETS_URL + "/datasets/dataset_part_1.csv", 'sha256': None,
+                       'dtype': LAUNCH_DTYPES},
+    'dataset_part_2': {'url': DATASETS_URL + "/datasets/dataset_part_2.csv", 'sha256': None,
+                       'dtype': dict(LAUNCH_DTYPES, Class='int64')},
+    'dataset_part_3': {'url': DATASETS_URL + "/datasets/dataset_part_3.csv", 'sha256': None,
+                       'dtype': 'float64'},
+    'spacex': {'url': DATASETS_URL + "/labs/module_2/data/Spacex.csv", 'sha256': None,
+               'dtype': {'Date': str, 'Time (UTC)': str, 'Booster_Version': str, 'Launch_Site': str, 'Payload': str,
+                         'PAYLOAD_MASS__KG_': 'Int64', 'Orbit': str, 'Customer': str, 'Mission_Outcome': str,
+                         'Landing_Outcome': str}},
+    'spacex_launch_geo': {'url': DATASETS_URL + "/datasets/spacex_launch_geo.csv", 'sha256': None,
+                          'dtype': {'Launch Site': str, 'class': 'int64', 'Lat': 'float64', 'Long': 'float64'}},
+}
+
+http_session = make_session(pool_size=4)
+
+
+# The SHA-256 of a file's content, read in blocks
+def file_digest(path, block_size=2**20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# The size and modification time of a file, which change whenever the file is written
+def file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# {name: {'sha256': digest of the CSV file, 'stamp': its file_stamp(), 'feather_stamp': file_stamp() of its Feather
+# copy}}. Manifests written before the stamps were kept map a name to the CSV digest alone
+def read_manifest(directory):
+    path = os.path.join(directory, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+    return {name: entry if isinstance(entry, dict) else {'sha256': entry} for name, entry in manifest.items()}
+
+
+def write_manifest(directory, manifest):
+    path = os.path.join(directory, 'manifest.json')
+    with open(path + '.part', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + '.part', path)
+
+
+# Streams `url` into `path`, through a .part file so that an interrupted download never leaves a partial file
+def download(url, path, chunk_size=64 * 1024):
+    with http_session.get(url, stream=True) as response:
+        response.raise_for_status()
+        with open(path + '.part', 'wb') as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+    os.replace(path + '.part', path)
+
+
+# Downloads a data set into `directory` unless it is there already, or again with `refresh`, and returns the path of
+# its CSV file once its SHA-256 matches the pinned or recorded one. Raises a ValueError when it doesn't. A file whose
+# size and modification time are those recorded with its digest is not hashed again
+def fetch_dataset(name, directory='datasets', refresh=False):
+    path = os.path.join(directory, name + '.csv')
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    if refresh or not os.path.exists(path):
+        download(DATASETS[name]['url'], path)
+        if refresh:
+            manifest.pop(name, None)
+    entry = manifest.get(name, {})
+    pinned = DATASETS[name]['sha256']
+    if entry.get('stamp') == file_stamp(path) and entry['sha256'] == (pinned or entry['sha256']):
+        return path
+    digest = file_digest(path)
+    expected = pinned or entry.get('sha256', digest)
+    if digest != expected:
+        if pinned:
+            recovery = "If the published file has changed, update its sha256 in DATASETS"
+        else:
+            recovery = "If the published file has changed, run fetch_dataset(%r, refresh=True) to accept it" % name
+        raise ValueError('%s has the SHA-256 %s instead of %s. %s' % (path, digest, expected, recovery))
+    # A new digest invalidates the Feather copy, the same one with a new stamp keeps it
+    manifest[name] = dict(entry if entry.get('sha256') == digest else {}, sha256=digest, stamp=file_stamp(path))
+    write_manifest(directory, manifest)
+    return path
+
+
+# Returns a data set as a data frame, memory-mapped from its Feather copy. The copy is converted again from the
+# verified CSV file when it is missing, when its size or modification time differ from those recorded when it was
+# written, which catches a truncated or rewritten file, or when the CSV file has a new digest
+def load_dataset(name, directory='datasets', refresh=False):
+    csv_path = fetch_dataset(name, directory, refresh)
+    path = os.path.join(directory, name + '.feather')
+    manifest = read_manifest(directory)
+    if not os.path.exists(path) or manifest[name].get('feather_stamp') != file_stamp(path):
+        frame = pd.read_csv(csv_path, dtype=DATASETS[name]['dtype'])
+        frame.to_feather(path + '.part', compression='uncompressed')
+        os.replace(path + '.part', path)
+        manifest[name]['feather_stamp'] = file_stamp(path)
+        write_manifest(directory, manifest)
+    return feather.read_feather(path, memory_map=True)
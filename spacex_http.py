@@ -0,0 +1,55 @@
+# The HTTP client shared by the labs: a pooled session that retries failed and throttled requests with jittered
+# exponential backoff and counts response times per host. Each lab creates its session with
+#
+#     from spacex_http import make_session
+#     http_session = make_session()
+
+import bisect
+import collections
+import random
+import threading
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+from urllib3.util.retry import Retry
+
+
+# Exponential backoff with full jitter, so that throttled clients don't all retry at the same moment.
+# A Retry-After header on a 429 or 503 response takes precedence over the backoff
+class JitteredRetry(Retry):
+    def get_backoff_time(self):
+        return random.uniform(0, super().get_backoff_time())
+
+
+# Counts response times per host in buckets of milliseconds; used as a response hook
+class LatencyHistogram:
+    BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf')]
+
+    def __init__(self):
+        self.counts = collections.defaultdict(lambda: [0] * len(self.BUCKETS))
+        self.lock = threading.Lock()
+
+    def __call__(self, response, *args, **kwargs):
+        bucket = bisect.bisect_left(self.BUCKETS, response.elapsed.total_seconds() * 1000)
+        with self.lock:
+            self.counts[urlparse(response.url).netloc][bucket] += 1
+
+    def to_frame(self):
+        columns = ['<=%gms' % bucket for bucket in self.BUCKETS[:-1]] + ['>%gms' % self.BUCKETS[-2]]
+        with self.lock:
+            return pd.DataFrame.from_dict(dict(self.counts), orient='index', columns=columns)
+
+
+# A session with `pool_size` keep-alive connections per host and up to `retries` retries of
+# connection errors, 429 and 5xx responses. Response times are counted in session.latency
+def make_session(pool_size=16, retries=5, backoff_factor=0.5):
+    retry = JitteredRetry(total=retries, backoff_factor=backoff_factor, status_forcelist=[429, 500, 502, 503, 504],
+                          allowed_methods=None, respect_retry_after_header=True, raise_on_status=False)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.latency = LatencyHistogram()
+    session.hooks['response'].append(session.latency)
+    return session